@@ -1,11 +1,16 @@
 import streamlit as st
 import pandas as pd
 from chatbot import operator_chatbot
-from data_utils import load_hourly, load_sessions
+from data_utils import load_hourly
+from forecast_cache import start_scheduler
+import session_store
 import altair as alt
 
 st.set_page_config(page_title="EV Load Forecaster", layout="wide")
 
+# Precompute the next week's forecasts in the background (once per process)
+start_scheduler()
+
 # ---------------------------------------------------
 # Sidebar Navigation
 # ---------------------------------------------------
@@ -77,9 +82,9 @@ if page == "💬 Chatbot":
             # ⭐ If message is hourly forecast, render graph
             if msg["role"] == "bot" and "Hour-by-hour" in msg["text"]:
                 # Load last forecast from chatbot memory
-                from chatbot import _last_forecast_df
-                if _last_forecast_df is not None:
-                    chart = alt.Chart(_last_forecast_df.reset_index()).mark_line().encode(
+                from chatbot import _last_forecast
+                if _last_forecast is not None and _last_forecast["chart"] is not None:
+                    chart = alt.Chart(_last_forecast["chart"]).mark_line().encode(
                         x="index:T",
                         y="pred:Q"
                     ).properties(
@@ -126,24 +131,56 @@ elif page == "📊 Raw Hourly Data":
 # ---------------------------------------------------
 elif page == "🚗 Charging Sessions":
     st.title("🚗 Charging Sessions Data")
-    df = load_sessions()
 
-    if df is None:
+    if not session_store.ensure_store():
         st.error("ev_charging_patterns.csv missing.")
     else:
-        st.dataframe(df, use_container_width=True)
-
-        if "Charger Type" in df.columns:
-            st.markdown("### ⚡ Energy Consumption by Charger Type")
-            chart = alt.Chart(
-                df.groupby("Charger Type")["Energy Consumed (kWh)"]
-                .sum()
-                .reset_index()
-            ).mark_bar().encode(
-                x="Charger Type:N",
-                y="Energy Consumed (kWh):Q",
-            )
-            st.altair_chart(chart, use_container_width=True)
+        # Filters are pushed down to the indexed session store
+        cols = st.columns(4)
+        filters = {}
+        for col, (key, label) in zip(cols, [
+            ("station", "Station"), ("location", "Location"),
+            ("charger_type", "Charger Type"), ("user_type", "User Type"),
+        ]):
+            choice = col.selectbox(label, ["All"] + session_store.distinct_values(key))
+            if choice != "All":
+                filters[key] = choice
+
+        st.dataframe(session_store.query_sessions(limit=1000, **filters), use_container_width=True)
+
+        st.markdown("### ⚡ Energy Consumption by Charger Type")
+        chart = alt.Chart(session_store.energy_by("charger_type", **filters)).mark_bar().encode(
+            x=alt.X("charger_type:N", title="Charger Type"),
+            y=alt.Y("energy_kwh:Q", title="Energy Consumed (kWh)"),
+        )
+        st.altair_chart(chart, use_container_width=True)
+
+        by_hour = session_store.usage_by_hour(**filters).set_index("hour")
+        st.markdown("### ⏰ Energy by Hour (kWh)")
+        st.bar_chart(by_hour["energy_kwh"])
+        st.markdown("### 📶 Utilization by Hour (share of station time occupied)")
+        st.bar_chart(by_hour["utilization"])
+
+        st.markdown("### 🏆 Top Stations")
+        st.dataframe(session_store.top_stations(10, **filters), use_container_width=True)
+
+        st.markdown("### 👥 User-Type Mix")
+        st.dataframe(session_store.user_type_mix(**filters), use_container_width=True)
+
+        st.markdown("### 📍 Station Hourly Profile")
+        if "station" not in filters:
+            st.info("Select a station above to see its hourly energy and utilization.")
+        else:
+            station_hours = session_store.usage_by_station_hour(**filters)
+            if station_hours is None or station_hours.empty:
+                st.warning("No sessions for this station with the selected filters.")
+            else:
+                profile = station_hours.set_index("hour")
+                st.caption("Energy by start hour (kWh)")
+                st.bar_chart(profile["energy_kwh"])
+                st.caption("Utilization by hour (share of the hour occupied)")
+                st.bar_chart(profile["utilization"])
+                st.dataframe(station_hours, use_container_width=True)
 
 
 # ---------------------------------------------------
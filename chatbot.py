@@ -12,6 +12,8 @@ Features:
 - Reject unrelated/gibberish queries politely
 - Never outputs forecasts unless EV-related
 - Remembers last date for follow-ups
+- Serves the next week from the background forecast cache
+- Charger / station / user-type analytics from the session store
 """
 
 from datetime import datetime, timedelta
@@ -19,11 +21,14 @@ from dateutil.parser import parse as dt_parse
 import calendar
 import re
 import pandas as pd
-from data_utils import load_hourly, load_sessions, today_date
+from data_utils import load_hourly, load_sessions, today_date, STATION_COL
+import forecast_cache
+import session_store
 
 # Memory for last forecasted date
 _last_date = None
 _last_forecast_df = None
+_last_forecast = None  # full entry: df, src, total, peak, chart
 
 
 # ------------------------------------------------------------
@@ -87,31 +92,49 @@ def parse_date_from_text(text):
     return _parse_relative(text) or _parse_weekday(text) or _parse_explicit(text)
 
 
+STATION_RE = re.compile(r'\bstation[_\s]?(\d+)\b', re.IGNORECASE)
+
+
+def parse_station_from_text(text):
+    """'station 35' / 'Station_35' -> ('Station_35', text without the station mention)."""
+    m = STATION_RE.search(text)
+    if not m:
+        return None, text
+    return f"Station_{m.group(1)}", STATION_RE.sub(" ", text)
+
+
 # ------------------------------------------------------------
 # PATTERN-ONLY FORECASTING
 # ------------------------------------------------------------
-def _weekday_profile(wd):
-    df = load_hourly()
+def _weekday_profile(wd, hourly=None, station=None):
+    df = load_hourly() if hourly is None else hourly
+    if df is not None and station is not None:
+        if STATION_COL not in df.columns:
+            return None, "no_station_data"
+        df = df[df[STATION_COL] == station]
+        if df.empty:
+            return None, "unknown_station"
     if df is None or df.empty:
         return None, "no_data"
 
-    df["wd"] = df["timestamp"].dt.weekday
-    df["hour"] = df["timestamp"].dt.hour
+    # Don't add columns: the frame may be shared across precomputed days
+    wds = df["timestamp"].dt.weekday
+    hours = df["timestamp"].dt.hour
 
-    same = df[df["wd"] == wd]
+    same = wds == wd
 
-    if not same.empty:
-        profile = same.groupby("hour")["energy_kwh"].mean().to_dict()
+    if same.any():
+        profile = df.loc[same, "energy_kwh"].groupby(hours[same]).mean().to_dict()
         return profile, "weekday_pattern"
 
     # fallback → global hourly pattern
-    profile = df.groupby("hour")["energy_kwh"].mean().to_dict()
+    profile = df["energy_kwh"].groupby(hours).mean().to_dict()
     return profile, "global_hourly_avg"
 
 
-def forecast_for_date(d):
+def forecast_for_date(d, hourly=None, station=None):
     wd = d.weekday()
-    profile, src = _weekday_profile(wd)
+    profile, src = _weekday_profile(wd, hourly=hourly, station=station)
 
     if profile is None:
         return None, src, None
@@ -130,24 +153,32 @@ def forecast_for_date(d):
 # ------------------------------------------------------------
 # HELPER FUNCTIONS
 # ------------------------------------------------------------
-def _remember(d):
-    global _last_date, _last_forecast_df
-    df, src, total = forecast_for_date(d)
+def _remember(d, station=None):
+    global _last_date, _last_forecast_df, _last_forecast
+    # Precomputed horizon first; on-demand only for dates outside it
+    entry = forecast_cache.get_forecast(d, station)
+    if entry is None:
+        entry = forecast_cache.build_entry(*forecast_for_date(d, station=station))
+    if entry["df"] is None:
+        # Nothing to show: keep the previous forecast for follow-ups
+        return None, entry["src"], None
     _last_date = d
-    _last_forecast_df = df
-    return df, src, total
+    _last_forecast = entry
+    _last_forecast_df = entry["df"]
+    return entry["df"], entry["src"], entry["total"]
 
 
-def _friendly_total(date, total, src):
+def _friendly_total(date, total, src, station=None):
     dayname = calendar.day_name[date.weekday()]
+    where = f" — {station}" if station else ""
     txt = (
-        f"📅 **{date.strftime('%d %b %Y')} ({dayname})**\n"
+        f"📅 **{date.strftime('%d %b %Y')} ({dayname}){where}**\n"
         f"🔋 **Expected total load:** ~{total:.2f} kWh\n"
         f"📘 *Based on: {src} pattern*\n\n"
     )
-    if _last_forecast_df is not None:
-        peak_ts = _last_forecast_df['pred'].idxmax()
-        peak_val = _last_forecast_df['pred'].max()
+    if _last_forecast is not None and _last_forecast["peak_ts"] is not None:
+        peak_ts = _last_forecast["peak_ts"]
+        peak_val = _last_forecast["peak_val"]
         txt += f"⏰ **Peak hour:** {peak_ts.strftime('%H:%M')} (~{peak_val:.2f} kWh)\n\n"
 
     txt += "💡 Tips: Shift flexible charging to low-demand hours and use load balancing during peaks."
@@ -161,6 +192,82 @@ def _friendly_hours(df, src):
     return "\n".join(lines)
 
 
+# ------------------------------------------------------------
+# SESSION ANALYTICS (charger / station / user type)
+# ------------------------------------------------------------
+def _analytics_window(q, day=None):
+    # An explicit date is that day; otherwise windows are relative to the
+    # latest session, like the dashboard's peak-hours page
+    if day is not None:
+        start = pd.Timestamp(day)
+        return start, start + pd.Timedelta(days=1), day.strftime("%d %b %Y")
+    days = 7 if "week" in q else 30 if "month" in q else None
+    if days is None:
+        return None, None, "all sessions"
+    _, hi = session_store.data_range()
+    if hi is None:
+        return None, None, "all sessions"
+    end = hi + pd.Timedelta(hours=1)
+    return end - pd.Timedelta(days=days), end, f"last {days} days of data"
+
+
+def _no_sessions(label):
+    lo, hi = session_store.data_range()
+    if lo is None:
+        return "No charging session data available (ev_charging_patterns.csv)."
+    return (
+        f"No charging sessions recorded for {label}. "
+        f"Session data covers {lo.strftime('%d %b %Y')} – {hi.strftime('%d %b %Y')}."
+    )
+
+
+def _session_analytics(q, station=None, day=None):
+    start, end, label = _analytics_window(q, day)
+    filters = {}
+    if station is not None:
+        filters["station"] = station
+        label = f"{station}, {label}"
+
+    if station is None and any(k in q for k in ["top station", "busiest station", "stations"]):
+        df = session_store.top_stations(5, start, end)
+        if df is None or df.empty:
+            return _no_sessions(label)
+        lines = [f"🏆 **Top stations by energy** ({label}):\n"]
+        for _, r in df.iterrows():
+            lines.append(f"• {r['station']} ({r['locations']}) → {r['energy_kwh']:.1f} kWh over {r['sessions']} sessions")
+        return "\n".join(lines)
+
+    if any(k in q for k in ["user type", "user mix", "user-type"]):
+        df = session_store.user_type_mix(start, end, **filters)
+        if df is None or df.empty:
+            return _no_sessions(label)
+        lines = [f"👥 **User-type mix** ({label}):\n"]
+        for _, r in df.iterrows():
+            lines.append(f"• {r['user_type']} → {r['session_share']:.0%} of sessions, {r['energy_share']:.0%} of energy")
+        return "\n".join(lines)
+
+    if station is not None and "charger" not in q:
+        df = session_store.usage_by_station_hour(start, end, **filters)
+        if df is None or df.empty:
+            return _no_sessions(label)
+        lines = [
+            f"📍 **Station usage** ({label}):\n",
+            f"{df['sessions'].sum()} sessions, {df['energy_kwh'].sum():.1f} kWh delivered.\n",
+            "Busiest hours (share of the hour occupied):",
+        ]
+        for _, r in df.sort_values("utilization", ascending=False).head(3).iterrows():
+            lines.append(f"• {int(r['hour']):02d}:00 → {r['utilization']:.0%} occupied, {r['energy_kwh']:.1f} kWh started")
+        return "\n".join(lines)
+
+    df = session_store.energy_by("charger_type", start, end, **filters)
+    if df is None or df.empty:
+        return _no_sessions(label)
+    lines = [f"🔌 **Charger-level usage** ({label}):\n"]
+    for _, r in df.iterrows():
+        lines.append(f"• {r['charger_type']} → {r['energy_kwh']:.1f} kWh over {r['sessions']} sessions")
+    return "\n".join(lines)
+
+
 # ------------------------------------------------------------
 # MAIN CHATBOT ROUTER
 # ------------------------------------------------------------
@@ -194,6 +301,7 @@ def operator_chatbot(user_input: str):
             "• Identify peak hours\n"
             "• Provide weekly summary\n"
             "• Analyze charger-level usage\n"
+            "• Top stations, station hourly usage and user-type mix\n"
             "• Explain how forecasting works\n"
             "• Smart follow-up memory\n"
         )
@@ -217,13 +325,25 @@ def operator_chatbot(user_input: str):
 
     # ---------------- DETAILED FORECAST ----------------
     if any(k in q for k in ["detailed", "hour-by-hour", "hourly", "show hours", "hourly forecast"]):
-        if _last_date is None:
+        if _last_date is None or _last_forecast_df is None:
             return "Which date do you want the detailed forecast for?"
         return _friendly_hours(_last_forecast_df, "pattern_cached")
 
+    station, date_text = parse_station_from_text(user_input)
+    maybe_date = parse_date_from_text(date_text)
+
+    # ---------------- CHARGER / STATION ANALYTICS ----------------
+    # Past/today dates and stations narrow the analytics; a future date or a
+    # forecast word means the operator wants a load forecast instead
+    analytics = ["charger", "top station", "busiest station", "stations", "user type", "user mix", "user-type"]
+    future = maybe_date is not None and maybe_date > today_date()
+    station_usage = station is not None and any(k in q for k in ["usage", "utilization", "utilisation", "busy"])
+    if ((any(k in q for k in analytics) or station_usage) and not future
+            and not any(w in q for w in ["load", "forecast", "peak"])):
+        return _session_analytics(q, station, maybe_date)
+
     # ---------------- UNRELATED / GIBBERISH DETECTION ----------------
     ev_related = ["load", "forecast", "charging", "station", "capacity", "ev", "energy", "peak"]
-    maybe_date = parse_date_from_text(user_input)
 
     if not any(w in q for w in ev_related) and maybe_date is None:
         return (
@@ -237,9 +357,18 @@ def operator_chatbot(user_input: str):
         )
 
     # ---------------- DATE PARSING + FORECAST ----------------
-    d = parse_date_from_text(user_input)
+    d = maybe_date
     if d is None:
         d = today_date() + timedelta(days=1)
 
-    df, src, total = _remember(d)
-    return _friendly_total(d, total, src)
+    df, src, total = _remember(d, station)
+    if src == "no_station_data":
+        return (
+            f"I don't have station-level load data for {station} yet. "
+            "hourly_ev_load.csv needs a 'Charging Station ID' column for per-station forecasts."
+        )
+    if src == "unknown_station":
+        return f"I don't have any hourly load data for {station} in hourly_ev_load.csv."
+    if total is None:
+        return "hourly_ev_load.csv not found or empty — I need past hourly load to forecast."
+    return _friendly_total(d, total, src, station)
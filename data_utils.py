@@ -11,6 +11,12 @@ from pathlib import Path
 import datetime
 
 DATA_DIR = Path(".")
+STATION_COL = "Charging Station ID"
+
+def data_mtime(path):
+    p = DATA_DIR / path
+    return p.stat().st_mtime if p.exists() else None
+
 
 def _safe_read(path):
     p = DATA_DIR / path
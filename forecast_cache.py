@@ -0,0 +1,109 @@
+# forecast_cache.py
+"""
+Background precomputation of the rolling forecast horizon.
+----------------------------------------------------------
+A daemon thread rebuilds forecasts, totals, peaks and chart-ready frames
+for the next HORIZON_DAYS days (and per station when the hourly data has
+a station column) whenever hourly_ev_load.csv changes or the day rolls
+over. The chatbot reads from here and only computes on demand for dates
+outside the horizon.
+"""
+
+import logging
+import threading
+from datetime import timedelta
+from data_utils import load_hourly, data_mtime, today_date, STATION_COL
+
+HOURLY_FILE = "hourly_ev_load.csv"
+HORIZON_DAYS = 7
+REFRESH_INTERVAL = 60  # seconds between data-refresh checks
+
+log = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_stop = threading.Event()
+_thread = None
+_cache = {}        # (date, station) -> forecast entry
+_cache_key = None  # (data mtime, today) the cache was built for
+
+
+# ------------------------------------------------------------
+# ENTRY BUILDING
+# ------------------------------------------------------------
+def build_entry(df, src, total):
+    """Bundle a forecast with its peak hour and chart-ready frame."""
+    entry = {"df": df, "src": src, "total": total,
+             "peak_ts": None, "peak_val": None, "chart": None}
+    if df is not None and not df.empty:
+        entry["peak_ts"] = df["pred"].idxmax()
+        entry["peak_val"] = df["pred"].max()
+        entry["chart"] = df.reset_index()
+    return entry
+
+
+def _build_horizon(horizon_days):
+    # Lazy import: chatbot imports this module for lookups
+    from chatbot import forecast_for_date
+
+    hourly = load_hourly(HOURLY_FILE)
+    stations = [None]
+    if hourly is not None and STATION_COL in hourly.columns:
+        stations += sorted(hourly[STATION_COL].dropna().unique())
+
+    start = today_date()
+    cache = {}
+    for i in range(horizon_days):
+        d = start + timedelta(days=i)
+        for station in stations:
+            cache[(d, station)] = build_entry(*forecast_for_date(d, hourly=hourly, station=station))
+    return cache
+
+
+# ------------------------------------------------------------
+# PUBLIC API
+# ------------------------------------------------------------
+def refresh(horizon_days=HORIZON_DAYS, force=False):
+    """Rebuild the horizon if the data or the date changed. Returns True if rebuilt."""
+    global _cache, _cache_key
+    key = (data_mtime(HOURLY_FILE), today_date())
+    if not force and key == _cache_key:
+        return False
+
+    cache = _build_horizon(horizon_days)
+    with _lock:
+        _cache = cache
+        _cache_key = key
+    return True
+
+
+def get_forecast(d, station=None):
+    """Return the precomputed entry for a date (and station), or None if outside the horizon."""
+    with _lock:
+        return _cache.get((d, station))
+
+
+def _run(horizon_days, interval):
+    while not _stop.is_set():
+        try:
+            refresh(horizon_days)
+        except Exception:
+            # keep serving the last good horizon; requests fall back to on-demand
+            log.exception("Forecast horizon refresh failed")
+        _stop.wait(interval)
+
+
+def start_scheduler(horizon_days=HORIZON_DAYS, interval=REFRESH_INTERVAL):
+    """Start the background refresher once per process (safe to call on every rerun)."""
+    global _thread
+    if _thread is not None and _thread.is_alive():
+        return _thread
+    _stop.clear()
+    _thread = threading.Thread(
+        target=_run, args=(horizon_days, interval), name="forecast-cache", daemon=True
+    )
+    _thread.start()
+    return _thread
+
+
+def stop_scheduler():
+    _stop.set()
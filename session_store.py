@@ -0,0 +1,303 @@
+# session_store.py
+"""
+Embedded SQLite store for charging-session analytics.
+-----------------------------------------------------
+Persists the sessions loaded by data_utils.load_sessions into sessions.db,
+indexed on station, location, charger type, user type and start time, so
+filtered aggregates run as indexed SQL instead of full pandas scans.
+An `occupancy` table spreads each session over the clock hours it spans,
+which is what utilization is computed from.
+The store is rebuilt automatically when ev_charging_patterns.csv changes.
+"""
+
+import sqlite3
+import threading
+from contextlib import closing
+import pandas as pd
+from data_utils import DATA_DIR, load_sessions, data_mtime
+
+SESSIONS_FILE = "ev_charging_patterns.csv"
+DB_FILE = "sessions.db"
+
+# CSV column -> store column
+COLUMNS = {
+    "User ID": "user_id",
+    "Vehicle Model": "vehicle_model",
+    "Charging Station ID": "station",
+    "Charging Station Location": "location",
+    "Charging Start Time": "start_time",
+    "Charging End Time": "end_time",
+    "Energy Consumed (kWh)": "energy_kwh",
+    "Charging Duration (hours)": "duration_h",
+    "Charging Rate (kW)": "rate_kw",
+    "Charging Cost (USD)": "cost_usd",
+    "Charger Type": "charger_type",
+    "User Type": "user_type",
+}
+INDEXED = ["station", "location", "charger_type", "user_type", "start_time"]
+FILTERS = ["station", "location", "charger_type", "user_type"]
+TIME_FMT = "%Y-%m-%d %H:%M:%S"
+HOUR = pd.Timedelta(hours=1)
+
+_build_lock = threading.Lock()
+_built_for = None  # source mtime the on-disk store is known to match
+
+
+# ------------------------------------------------------------
+# BUILD / REFRESH
+# ------------------------------------------------------------
+def _connect():
+    # sqlite3's own context manager only commits; closing() releases the handle
+    return closing(sqlite3.connect(DATA_DIR / DB_FILE))
+
+
+def _stored_mtime(con):
+    try:
+        row = con.execute("SELECT value FROM meta WHERE key = 'source_mtime'").fetchone()
+    except sqlite3.OperationalError:
+        return None
+    return float(row[0]) if row else None
+
+
+def _occupancy(out):
+    """One row per session per clock hour it spans, with the hours occupied in that slot."""
+    out = out.reset_index(drop=True)
+    start = out["start_time"]
+    if "end_time" in out.columns:
+        end = out["end_time"].fillna(start + pd.to_timedelta(out["duration_h"], unit="h"))
+    else:
+        end = start + pd.to_timedelta(out["duration_h"], unit="h")
+    end = end.where(end > start, start)
+
+    first = start.dt.floor("h")
+    n_slots = (-((first - end) // HOUR)).clip(lower=1).astype(int)  # ceil
+    idx = out.index.repeat(n_slots)
+
+    occ = out.loc[idx, [c for c in FILTERS if c in out.columns]].reset_index(drop=True)
+    offset = pd.Series(idx).groupby(idx).cumcount() * HOUR
+    slot = first.loc[idx].reset_index(drop=True) + offset
+    slot_end = slot + HOUR
+    s = start.loc[idx].reset_index(drop=True).where(lambda x: x > slot, slot)
+    e = end.loc[idx].reset_index(drop=True).where(lambda x: x < slot_end, slot_end)
+
+    occ["hour"] = slot.dt.hour
+    occ["slot_time"] = slot.dt.strftime(TIME_FMT)
+    occ["occupied_h"] = ((e - s) / HOUR).clip(lower=0)
+    return occ
+
+
+def build_store(df=None):
+    """(Re)create the sessions table and its indexes from the session CSV."""
+    global _built_for
+    mtime = data_mtime(SESSIONS_FILE)
+    if df is None:
+        df = load_sessions(SESSIONS_FILE)
+    if df is None:
+        return False
+
+    out = df[[c for c in COLUMNS if c in df.columns]].rename(columns=COLUMNS)
+    occ = _occupancy(out)
+    out["start_hour"] = out["start_time"].dt.hour
+    out["start_time"] = out["start_time"].dt.strftime(TIME_FMT)
+    if "end_time" in out.columns:
+        out["end_time"] = out["end_time"].dt.strftime(TIME_FMT)
+
+    # Stage into *_new tables (to_sql commits on its own), then swap them in
+    # and index them in a single transaction so readers never see a
+    # missing or half-built table
+    with _connect() as con:
+        out.to_sql("sessions_new", con, if_exists="replace", index=False)
+        occ.to_sql("occupancy_new", con, if_exists="replace", index=False)
+
+        con.isolation_level = None  # explicit BEGIN/COMMIT below
+        con.execute("BEGIN IMMEDIATE")
+        try:
+            con.execute("DROP TABLE IF EXISTS sessions")
+            con.execute("DROP TABLE IF EXISTS occupancy")
+            con.execute("ALTER TABLE sessions_new RENAME TO sessions")
+            con.execute("ALTER TABLE occupancy_new RENAME TO occupancy")
+            for col in INDEXED:
+                if col in out.columns:
+                    con.execute(f"CREATE INDEX idx_sessions_{col} ON sessions ({col})")
+            con.execute("CREATE INDEX idx_sessions_station_hour ON sessions (station, start_hour)")
+            for col in FILTERS + ["slot_time"]:
+                if col in occ.columns:
+                    con.execute(f"CREATE INDEX idx_occupancy_{col} ON occupancy ({col})")
+            con.execute("CREATE INDEX idx_occupancy_station_hour ON occupancy (station, hour)")
+            con.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+            con.execute("INSERT OR REPLACE INTO meta VALUES ('source_mtime', ?)", (str(mtime),))
+            con.execute("COMMIT")
+        except Exception:
+            con.execute("ROLLBACK")
+            raise
+    _built_for = mtime
+    return True
+
+
+def ensure_store():
+    """Build the store if missing or older than the session CSV. Returns False if no data."""
+    global _built_for
+    mtime = data_mtime(SESSIONS_FILE)
+    if mtime is None:
+        return (DATA_DIR / DB_FILE).exists()
+    if mtime == _built_for:
+        return True
+
+    with _build_lock:
+        if mtime == _built_for:
+            return True
+        with _connect() as con:
+            stored = _stored_mtime(con)
+        if stored == mtime:
+            _built_for = mtime
+            return True
+        return build_store()
+
+
+# ------------------------------------------------------------
+# QUERY HELPERS
+# ------------------------------------------------------------
+def _where(start=None, end=None, time_col="start_time", **filters):
+    clauses, params = [], []
+    if start is not None:
+        clauses.append(f"{time_col} >= ?")
+        params.append(pd.Timestamp(start).strftime(TIME_FMT))
+    if end is not None:
+        clauses.append(f"{time_col} < ?")
+        params.append(pd.Timestamp(end).strftime(TIME_FMT))
+    for col in FILTERS:
+        val = filters.get(col)
+        if val is not None:
+            clauses.append(f"{col} = ?")
+            params.append(val)
+    return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+
+def _query(sql, params=()):
+    if not ensure_store():
+        return None
+    with _connect() as con:
+        return pd.read_sql_query(sql, con, params=params)
+
+
+def _window_days(start=None, end=None):
+    # Days in the window; open ends use the full (unfiltered) data range so
+    # per-day values stay comparable across filter selections
+    lo, hi = data_range()
+    lo = pd.Timestamp(start) if start is not None else lo.normalize() if lo is not None else None
+    hi = pd.Timestamp(end) if end is not None else hi.normalize() + pd.Timedelta(days=1) if hi is not None else None
+    if lo is None or hi is None:
+        return 1.0
+    return max((hi - lo).total_seconds() / 86400, 1.0)
+
+
+def _station_count(start=None, end=None, **filters):
+    # Stations with any occupied time in the window (same rows as the numerator)
+    where, params = _where(start, end, time_col="slot_time", **filters)
+    df = _query(f"SELECT COUNT(DISTINCT station) AS n FROM occupancy{where}", params)
+    return 0 if df is None else int(df["n"][0])
+
+
+def _usage(group_cols, start=None, end=None, **filters):
+    # Sessions/energy by start hour joined with hours occupied by clock hour
+    keys = ", ".join(group_cols)
+    start_keys = ", ".join("start_hour" if c == "hour" else c for c in group_cols)
+    where, params = _where(start, end, **filters)
+    started = _query(
+        f"SELECT {start_keys}, COUNT(*) AS sessions, SUM(energy_kwh) AS energy_kwh "
+        f"FROM sessions{where} GROUP BY {start_keys}",
+        params,
+    )
+    started = started.rename(columns={"start_hour": "hour"}) if started is not None else None
+    where, params = _where(start, end, time_col="slot_time", **filters)
+    occupied = _query(
+        f"SELECT {keys}, SUM(occupied_h) AS occupied_hours FROM occupancy{where} GROUP BY {keys}",
+        params,
+    )
+    if started is None or occupied is None:
+        return None
+    df = started.merge(occupied, on=group_cols, how="outer").sort_values(group_cols)
+    df[["sessions", "energy_kwh", "occupied_hours"]] = df[["sessions", "energy_kwh", "occupied_hours"]].fillna(0)
+    df["sessions"] = df["sessions"].astype(int)
+    return df.reset_index(drop=True)
+
+
+# ------------------------------------------------------------
+# PUBLIC QUERY API
+# ------------------------------------------------------------
+def data_range():
+    """(first, last) session start time in the store, or (None, None)."""
+    df = _query("SELECT MIN(start_time) AS lo, MAX(start_time) AS hi FROM sessions")
+    if df is None or df["lo"].isna().all():
+        return None, None
+    return pd.Timestamp(df["lo"][0]), pd.Timestamp(df["hi"][0])
+
+
+def distinct_values(col):
+    """Sorted distinct values of a filter column, for dashboard selectors."""
+    if col not in FILTERS:
+        raise ValueError(f"Unknown filter column: {col}")
+    df = _query(f"SELECT DISTINCT {col} FROM sessions WHERE {col} IS NOT NULL ORDER BY {col}")
+    return [] if df is None else df[col].tolist()
+
+
+def query_sessions(limit=1000, start=None, end=None, **filters):
+    """Most recent raw sessions matching the filters."""
+    where, params = _where(start, end, **filters)
+    return _query(f"SELECT * FROM sessions{where} ORDER BY start_time DESC LIMIT ?", params + [limit])
+
+
+def energy_by(group_col, start=None, end=None, **filters):
+    """Sessions and energy (kWh) grouped by a filter column."""
+    if group_col not in FILTERS:
+        raise ValueError(f"Unknown group column: {group_col}")
+    where, params = _where(start, end, **filters)
+    return _query(
+        f"SELECT {group_col}, COUNT(*) AS sessions, SUM(energy_kwh) AS energy_kwh "
+        f"FROM sessions{where} GROUP BY {group_col} ORDER BY energy_kwh DESC",
+        params,
+    )
+
+
+def usage_by_station_hour(start=None, end=None, **filters):
+    """
+    Energy and utilization per station and hour of day.
+    sessions / energy_kwh count sessions by start hour; utilization is the
+    fraction of that clock hour the station was occupied, averaged over the days in the window.
+    """
+    df = _usage(["station", "hour"], start, end, **filters)
+    if df is not None:
+        df["utilization"] = df["occupied_hours"] / _window_days(start, end)
+    return df
+
+
+def usage_by_hour(start=None, end=None, **filters):
+    """
+    Energy and utilization per hour of day across all matching stations.
+    utilization = occupied station-hours / (days in window x stations active in it).
+    """
+    df = _usage(["hour"], start, end, **filters)
+    if df is not None:
+        slots = _window_days(start, end) * max(_station_count(start, end, **filters), 1)
+        df["utilization"] = df["occupied_hours"] / slots
+    return df
+
+
+def top_stations(n=5, start=None, end=None, **filters):
+    """Top-n stations by energy delivered (a station ID can appear under several locations)."""
+    where, params = _where(start, end, **filters)
+    return _query(
+        "SELECT station, GROUP_CONCAT(DISTINCT location) AS locations, COUNT(*) AS sessions, "
+        "SUM(energy_kwh) AS energy_kwh, SUM(duration_h) AS charging_hours "
+        f"FROM sessions{where} GROUP BY station ORDER BY energy_kwh DESC LIMIT ?",
+        params + [n],
+    )
+
+
+def user_type_mix(start=None, end=None, **filters):
+    """Session and energy share per user type."""
+    df = energy_by("user_type", start, end, **filters)
+    if df is not None and not df.empty:
+        df["session_share"] = df["sessions"] / df["sessions"].sum()
+        df["energy_share"] = df["energy_kwh"] / df["energy_kwh"].sum()
+    return df